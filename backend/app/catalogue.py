@@ -0,0 +1,169 @@
+# backend/app/catalogue.py
+"""
+Catálogo de praias em streaming (NDJSON, uma praia por linha).
+
+O beaches.json (array) continua a ser lido, mas sem carregar o ficheiro
+inteiro de uma vez. Para juntar fontes grandes (ex: registo europeu de águas
+balneares) e remover quase-duplicados:
+
+    python -m backend.app.catalogue data/beaches.json extra.ndjson --radius-km 0.05
+
+Isto escreve data/beaches.ndjson (usado pelo backend e pelo batch se existir)
+e atualiza data/beach_index.json: o índice inteiro estável de cada praia,
+partilhado por todos os artefactos (cubo, etc). Um id nunca muda de índice;
+praias novas vão para o fim.
+"""
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+import argparse, json, math, os
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+NDJSON_PATH = DATA_DIR / "beaches.ndjson"
+JSON_PATH = DATA_DIR / "beaches.json"
+INDEX_PATH = DATA_DIR / "beach_index.json"
+
+def default_path() -> Path:
+    """BEACHES_PATH, senão beaches.ndjson se existir, senão beaches.json."""
+    env = os.getenv("BEACHES_PATH")
+    if env: return Path(env)
+    return NDJSON_PATH if NDJSON_PATH.exists() else JSON_PATH
+
+# --- Leitura ---
+def _iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[dict]:
+    """Objetos de um array JSON, lidos aos bocados com raw_decode."""
+    dec = json.JSONDecoder()
+    buf, pos, started, eof = "", 0, False, False
+    while True:
+        # Saltar espaços e separadores
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof: break
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+        if pos >= len(buf): return
+        if not started:
+            if buf[pos] != "[": raise ValueError("Esperava um array JSON")
+            started, pos = True, pos + 1
+            continue
+        if buf[pos] == "]": return
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof: raise
+            chunk = f.read(chunk_size)
+            buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+            continue
+        yield obj
+        pos = end
+        if pos > chunk_size:
+            buf, pos = buf[pos:], 0
+
+def iter_beaches(path: Path | None = None) -> Iterator[dict]:
+    path = Path(path or default_path())
+    with path.open("r", encoding="utf-8-sig") as f:
+        if path.suffix in (".ndjson", ".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line: yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+def write_ndjson(path: Path, beaches: Iterable[dict]) -> int:
+    n = 0
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        for b in beaches:
+            f.write(json.dumps(b, ensure_ascii=False, separators=(",", ":")) + "\n")
+            n += 1
+    tmp.replace(path)
+    return n
+
+# --- Dedupe (hash espacial) ---
+def _km(lat1, lon1, lat2, lon2) -> float:
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
+    return 6371 * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+class SpatialDedupe:
+    """Rejeita praias a menos de radius_km de uma já aceite (ou com id repetido)."""
+
+    def __init__(self, radius_km: float = 0.05):
+        self.radius_km = radius_km
+        self.cell = max(radius_km / 111.32, 1e-6)  # lado da célula em graus de latitude
+        self.grid: Dict[Tuple[int, int], List[Tuple[float, float]]] = {}
+        self.ids: set = set()
+        self.dropped = 0
+
+    def add(self, b: dict) -> bool:
+        if b["id"] in self.ids:
+            self.dropped += 1
+            return False
+        lat, lon = float(b["lat"]), float(b["lon"])
+        ci, cj = int(math.floor(lat / self.cell)), int(math.floor(lon / self.cell))
+        # Em longitude o raio ocupa mais células quanto mais longe do equador
+        span = int(math.ceil(1 / max(math.cos(math.radians(lat)), 0.05)))
+        if self.radius_km > 0:
+            for di in (-1, 0, 1):
+                for dj in range(-span, span + 1):
+                    for plat, plon in self.grid.get((ci + di, cj + dj), ()):
+                        if _km(lat, lon, plat, plon) <= self.radius_km:
+                            self.dropped += 1
+                            return False
+        self.grid.setdefault((ci, cj), []).append((lat, lon))
+        self.ids.add(b["id"])
+        return True
+
+def dedupe(beaches: Iterable[dict], radius_km: float = 0.05, seen: SpatialDedupe | None = None) -> Iterator[dict]:
+    seen = seen or SpatialDedupe(radius_km)
+    for b in beaches:
+        if seen.add(b): yield b
+
+# --- Índice estável ---
+class BeachIndex:
+    """id -> inteiro, estável entre runs (ficheiro JSON com a lista de ids)."""
+
+    def __init__(self, ids: List[str] | None = None):
+        self.ids: List[str] = list(ids or [])
+        self.pos: Dict[str, int] = {bid: i for i, bid in enumerate(self.ids)}
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> "BeachIndex":
+        return cls(json.loads(path.read_text("utf-8")) if path.exists() else [])
+
+    def save(self, path: Path = INDEX_PATH):
+        path.write_text(json.dumps(self.ids, ensure_ascii=False), "utf-8")
+
+    def add(self, bid: str) -> int:
+        i = self.pos.get(bid)
+        if i is None:
+            i = self.pos[bid] = len(self.ids)
+            self.ids.append(bid)
+        return i
+
+    def __len__(self):
+        return len(self.ids)
+
+def main():
+    ap = argparse.ArgumentParser(description="Junta catálogos de praias em NDJSON sem duplicados")
+    ap.add_argument("sources", nargs="*", type=Path, default=[JSON_PATH])
+    ap.add_argument("--out", type=Path, default=NDJSON_PATH)
+    ap.add_argument("--radius-km", type=float, default=0.05)
+    ap.add_argument("--index", type=Path, default=INDEX_PATH)
+    args = ap.parse_args()
+
+    index = BeachIndex.load(args.index)
+    seen = SpatialDedupe(args.radius_km)
+
+    def merged():
+        for src in args.sources:
+            for b in dedupe(iter_beaches(src), seen=seen):
+                index.add(b["id"])
+                yield b
+
+    n = write_ndjson(args.out, merged())
+    index.save(args.index)
+    print(f"✓ {n} praias em {args.out} ({seen.dropped} duplicadas removidas, índice com {len(index)} ids)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+# backend/app/cube.py
+"""
+Cubo de scores pré-calculado pelo batch: para cada (zona, modo, hora) a lista
+de praias já ordenada por nota. O /top por zona passa a ser um slice + filtro
+de tipo de água, sem scoring.
+
+Notas e breakdown guardam-se em uint8 como deci-scores (nota 7.3 -> 73;
+255 = sem dados), o que é exato porque o batch já arredonda a 1 casa decimal.
+As componentes (vento, meteo, ondas, agua) e o cap vão em float64, para o /top
+poder aplicar outros pesos sem rerun do batch (weighted()); são os mesmos
+floats gravados em cada item do scores, por isso o /top ao vivo
+(scoring.combine_stored) dá as mesmas notas e, com os pesos do modo, a nota do
+batch. Menos precisão (float32, milésimas) mudava notas arredondadas no limite.
+
+Formato do ficheiro (data/cube.bin):
+    MAGIC | uint32 tamanho do header | header JSON | blocos
+    header = ids, modos, horas, chaves, zonas e scores_versions (os scores
+             escritos no mesmo run; um cubo de outro run é ignorado)
+    blocos = [modo][hora] -> nota[N] + breakdown[K][N]   (uint8)
+           + [zona][modo][hora] -> índices ordenados      (uint16 LE; uint32 com N > 65536)
+           + [modo][hora] -> componentes[C][N]            (float64 LE, NaN = sem dados)
+
+Tamanho (N praias, Z = soma dos membros de todas as zonas, K = 5 chaves,
+C = 5 componentes):
+    por hora e modo: N * (1 + K) + 2 * Z + 8 * C * N bytes   (4 * Z com índices uint32)
+Com as 603 praias atuais (Z = 603) e 2 modos isto dá ~57 KB por hora,
+~1.4 MB por dia de previsão (5 dias: ~7 MB; só notas e rankings: ~231 KB/dia).
+Construir 5 dias (~120 mil itens) demora ~1.3 s, ~0.3 s por dia extra;
+ambos crescem linearmente.
+"""
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List
+import json, math, struct, sys
+
+from .timeslots import HourCache, parse_hour, to_iso
+
+MAGIC = b"PFCUBE4\n"
+NO_DATA = 255
+BREAKDOWN_KEYS = ("vento", "meteo", "agua", "ondas", "offshore")
+COMPONENT_KEYS = ("vento", "meteo", "ondas", "agua", "cap")
+# Typecode dos índices ordenados -> bytes por índice (vai no header)
+INDEX_WIDTH = {"H": 2, "I": 4}
+
+def index_type(n: int) -> str:
+    """Typecode dos índices 0..n-1: uint16 ("H") enquanto cabem, senão uint32 ("I")."""
+    if n <= 1 << 16:
+        return "H"
+    if n <= 1 << 32:
+        return "I"
+    raise ValueError(f"Demasiadas praias para o cubo: {n}")
+
+def _deci(v) -> int:
+    return NO_DATA if v is None else max(0, min(254, int(round(v * 10))))
+
+def _le_bytes(a: array) -> bytes:
+    if sys.byteorder == "big":
+        a = array(a.typecode, a); a.byteswap()
+    return a.tobytes()
+
+def _le_array(typecode: str, buf) -> array:
+    a = array(typecode)
+    a.frombytes(buf)
+    if sys.byteorder == "big": a.byteswap()
+    return a
+
+def build(beaches: List[dict], items: Iterable[dict], modes=("familia", "surf"),
+          beach_ids: List[str] | None = None, scores_versions: Iterable[str] = ()) -> bytes:
+    """Constrói o cubo a partir das praias (catálogo) e dos itens do batch.
+
+    beach_ids é o índice partilhado (catalogue.BeachIndex); por omissão a
+    ordem de 'beaches'. scores_versions são as versões dos scores escritos
+    com estes itens (store.ScoreIndex.version): o backend ignora o cubo se
+    os scores em uso forem outros.
+    """
+    ids = list(beach_ids) if beach_ids is not None else [b["id"] for b in beaches]
+    pos = {bid: i for i, bid in enumerate(ids)}
+    n = len(ids)
+    itype = index_type(n)
+
+    zones: Dict[str, List[int]] = {}
+    for b in sorted((b for b in beaches if b["id"] in pos), key=lambda b: pos[b["id"]]):
+        for t in {(t or "").lower() for t in b.get("zone_tags", [])}:
+            if t: zones.setdefault(t, []).append(pos[b["id"]])
+
+    items = [it for it in items if it.get("beach_id") in pos and it.get("mode") in modes]
+    hour = HourCache()
+    hours = sorted({hour(it["ts"]) for it in items})
+    h_pos = {h: i for i, h in enumerate(hours)}
+    m_pos = {m: i for i, m in enumerate(modes)}
+
+    # [modo][hora] -> (nota, breakdown...)
+    planes = [[[bytearray([NO_DATA]) * n for _ in range(1 + len(BREAKDOWN_KEYS))]
+               for _ in hours] for _ in modes]
+    comps = [[[array("d", [math.nan]) * n for _ in COMPONENT_KEYS]
+              for _ in hours] for _ in modes]
+    for it in items:
+        m, h = m_pos[it["mode"]], h_pos[hour(it["ts"])]
+        p = planes[m][h]
+        i = pos[it["beach_id"]]
+        p[0][i] = _deci(it.get("nota"))
+        bd = it.get("breakdown") or {}
+        for k, key in enumerate(BREAKDOWN_KEYS, start=1):
+            p[k][i] = _deci(bd.get(key))
+        c = it.get("components")  # scoring.stored_components
+        if c is not None:
+            for k, key in enumerate(COMPONENT_KEYS):
+                comps[m][h][k][i] = c[key]
+
+    blob = bytearray()
+    for m in range(len(modes)):
+        for h in range(len(hours)):
+            for plane in planes[m][h]:
+                blob += plane
+    zone_names = sorted(zones)
+    for z in zone_names:
+        members = zones[z]
+        for m in range(len(modes)):
+            for h in range(len(hours)):
+                nota = planes[m][h][0]
+                # Sem dados conta como 0; empates mantêm a ordem do catálogo
+                ranked = sorted(members, key=lambda i: -(0 if nota[i] == NO_DATA else nota[i]))
+                blob += _le_bytes(array(itype, ranked))
+    for m in range(len(modes)):
+        for h in range(len(hours)):
+            for col in comps[m][h]:
+                blob += _le_bytes(col)
+
+    header = json.dumps({
+        "beach_ids": ids,
+        "modes": list(modes),
+        "hours": [to_iso(h) for h in hours],
+        "breakdown_keys": list(BREAKDOWN_KEYS),
+        "component_keys": list(COMPONENT_KEYS),
+        "zones": {z: len(zones[z]) for z in zone_names},
+        "index_type": itype,
+        "scores_versions": list(scores_versions),
+    }, separators=(",", ":")).encode("utf-8")
+    return MAGIC + struct.pack("<I", len(header)) + header + bytes(blob)
+
+def write(path: Path, beaches: List[dict], items: Iterable[dict], beach_ids: List[str] | None = None,
+          scores_versions: Iterable[str] = ()) -> int:
+    data = build(beaches, items, beach_ids=beach_ids, scores_versions=scores_versions)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return len(data)
+
+class Cube:
+    def __init__(self, data: bytes):
+        if not data.startswith(MAGIC):
+            raise ValueError("Ficheiro de cubo inválido")
+        (hlen,) = struct.unpack_from("<I", data, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(data[start:start + hlen])
+        self.buf = memoryview(data)[start + hlen:]
+        self.beach_ids: List[str] = header["beach_ids"]
+        self.modes: List[str] = header["modes"]
+        # Horas como int (timeslots); no ficheiro vão em ISO
+        self.hours: List[int] = [parse_hour(t) for t in header["hours"]]
+        self.keys: List[str] = header["breakdown_keys"]
+        self.component_keys: List[str] = header["component_keys"]
+        self.scores_versions: List[str] = header.get("scores_versions", [])
+        self.n = len(self.beach_ids)
+        self.index_type: str = header.get("index_type", "H")
+        if array(self.index_type).itemsize != INDEX_WIDTH[self.index_type]:
+            raise ValueError(f"Typecode {self.index_type!r} sem {INDEX_WIDTH[self.index_type]} bytes nesta plataforma")
+        self._iw = INDEX_WIDTH[self.index_type]
+
+        n_h, n_m = len(self.hours), len(self.modes)
+        self._plane = self.n * (1 + len(self.keys))
+        off = n_m * n_h * self._plane
+        self._zones: Dict[str, tuple] = {}  # zona -> (offset, nº membros)
+        for z, size in header["zones"].items():
+            self._zones[z] = (off, size)
+            off += n_m * n_h * size * self._iw
+        self._components = off
+
+    def matches(self, scores_version: str | None) -> bool:
+        """True se o cubo foi construído com estes scores."""
+        return scores_version is not None and scores_version in self.scores_versions
+
+    @property
+    def zones(self) -> List[str]:
+        return list(self._zones)
+
+    def has(self, zone: str, mode: str) -> bool:
+        return zone in self._zones and mode in self.modes
+
+    def hour_index(self, hour: int) -> int | None:
+        """Primeira hora >= hour (como o /top ao vivo); a última se já passou."""
+        if not self.hours: return None
+        i = bisect_left(self.hours, hour)
+        return min(i, len(self.hours) - 1)
+
+    def ranked(self, zone: str, mode: str, h: int) -> array:
+        off, size = self._zones[zone]
+        m = self.modes.index(mode)
+        start = off + ((m * len(self.hours)) + h) * size * self._iw
+        return _le_array(self.index_type, self.buf[start:start + size * self._iw])
+
+    def components(self, mode: str, h: int) -> Dict[str, array]:
+        width = self.n * 8
+        start = self._components + (self.modes.index(mode) * len(self.hours) + h) * width * len(self.component_keys)
+        return {key: _le_array("d", self.buf[start + k * width:start + (k + 1) * width])
+                for k, key in enumerate(self.component_keys)}
+
+    def plane(self, mode: str, h: int) -> memoryview:
+        """nota[N] seguido de breakdown[K][N] para um modo/hora."""
+        start = (self.modes.index(mode) * len(self.hours) + h) * self._plane
+        return self.buf[start:start + self._plane]
+
+    def entry(self, plane: memoryview, i: int) -> tuple[float | None, Dict[str, float]]:
+        nota = plane[i]
+        breakdown = {}
+        for k, key in enumerate(self.keys, start=1):
+            v = plane[k * self.n + i]
+            if v != NO_DATA: breakdown[key] = v / 10
+        return (None if nota == NO_DATA else nota / 10), breakdown
+
+def weighted(comps: Dict[str, array], weights: Dict[str, float], idx: Iterable[int]) -> List[float | None]:
+    """Notas com outros pesos: o mesmo produto interno que scoring.combine_stored, por praia."""
+    cols = [(comps[k], w) for k, w in weights.items()]
+    cap = comps["cap"]
+    out: List[float | None] = []
+    for i in idx:
+        if math.isnan(cap[i]):
+            out.append(None)
+            continue
+        final = sum(col[i] * w for col, w in cols)
+        out.append(round(min(final * 10.0, cap[i]), 1))
+    return out
+
+def read(path: Path) -> tuple[Cube, int]:
+    data = path.read_bytes()
+    return Cube(data), len(data)
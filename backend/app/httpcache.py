@@ -0,0 +1,46 @@
+# backend/app/httpcache.py
+"""
+Cabeçalhos de cache HTTP para respostas que só mudam quando o batch corre.
+
+ETag = versão dos dados (store.version) + query normalizada. Cache-Control
+dura até ao próximo refresh esperado do batch (DATA_REFRESH_S depois do
+último scores), e nunca passa da hora seguinte para pedidos sem 'when'
+(o "agora" muda de slot). Com If-None-Match igual devolve-se 304 sem
+correr a query.
+"""
+from typing import Any, Dict, Mapping
+import hashlib, os, time
+
+from fastapi import Request, Response
+
+# Intervalo esperado entre runs do batch
+DATA_REFRESH_S = int(os.getenv("DATA_REFRESH_S", "10800"))
+MIN_MAX_AGE_S = 60
+
+def make_etag(version: str, params: Mapping[str, Any]) -> str:
+    norm = "&".join(f"{k}={params[k]}" for k in sorted(params) if params[k] is not None)
+    return '"' + hashlib.sha1(f"{version}?{norm}".encode()).hexdigest()[:20] + '"'
+
+def max_age(data_mtime: float, until: float | None = None, now: float | None = None) -> int:
+    """Segundos até ao próximo refresh esperado (ou até 'until', se vier antes)."""
+    now = time.time() if now is None else now
+    expires = data_mtime + DATA_REFRESH_S
+    if expires <= now:
+        # Batch atrasado (ou sem dados): cache curta
+        expires = now + MIN_MAX_AGE_S
+    if until is not None:
+        expires = min(expires, until)
+    return max(1, int(expires - now))
+
+def headers(etag: str, age: int) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": f"public, max-age={age}"}
+
+def not_modified(request: Request, etag: str) -> bool:
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+    return etag in tags or "*" in tags
+
+def response_304(h: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=h)
@@ -1,27 +1,20 @@
 from contextlib import asynccontextmanager
-from pathlib import Path
-import json, math, os
-from datetime import datetime, timezone
+import math, threading
 from bisect import bisect_left
 from typing import List, Dict, Tuple
+import traceback
 
-from fastapi import FastAPI, Query, HTTPException
+from . import startup
+
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+startup.mark("import fastapi")
 
 # Importar lógica local
 from .models import Beach, BeachScore, Mode, WaterFilter, SortOrder
-from .scoring import calculate_score, Conditions, BeachInfo
-
-# --- CONFIG ---
-DATA_DIR = Path(__file__).resolve().parents[2] / "data"
-BEACHES_PATH = DATA_DIR / "beaches.json"
-SCORES_PATH = DATA_DIR / "scores.json"
-
-# Globais em Memória ( RAM é barata, JSON parsing é caro)
-DB_BEACHES: List[Beach] = []
-DB_SCORES: Dict[str, List[dict]] = {} # Indexado por beach_id
-LAST_UPDATE: datetime | None = None
+from .scoring import combine_stored, custom_weights, get_profile
+from . import store, timeslots, httpcache
+startup.mark("import app")
 
 # --- UTILS ---
 def haversine(lat1, lon1, lat2, lon2):
@@ -31,106 +24,97 @@ def haversine(lat1, lon1, lat2, lon2):
     return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
 
 def load_data():
-    """Carrega dados para a RAM no arranque."""
-    global DB_BEACHES, DB_SCORES, LAST_UPDATE
-    
-    print("Loading Beaches...")
-    if BEACHES_PATH.exists():
-        raw = json.loads(BEACHES_PATH.read_text("utf-8"))
-        DB_BEACHES = [Beach(**b) for b in raw]
-    
-    print("Loading Scores...")
-    # Aqui podes adicionar a lógica S3 se quiseres manter
-    if SCORES_PATH.exists():
-        raw_scores = json.loads(SCORES_PATH.read_text("utf-8"))
-        # Indexar scores por ID para lookup O(1)
-        temp_idx = {}
-        last_ts = datetime.min.replace(tzinfo=timezone.utc)
-        
-        for s in raw_scores:
-            bid = s.get("beach_id")
-            if not bid: continue
-            
-            # Parse TS
-            try:
-                ts_str = s.get("ts")
-                ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                if ts > last_ts: last_ts = ts
-                
-                if bid not in temp_idx: temp_idx[bid] = []
-                
-                # Guardar objeto 'condições' limpo
-                # Assumimos que o JSON já tem os campos 'wind_speed', etc.
-                # Se o teu JSON de scores tem estrutura diferente, adapta aqui.
-                temp_idx[bid].append((ts, s))
-            except Exception:
-                continue
-                
-        # Ordenar listas temporais
-        for bid in temp_idx:
-            temp_idx[bid].sort(key=lambda x: x[0])
-            
-        DB_SCORES = temp_idx
-        LAST_UPDATE = last_ts
-        print(f"Loaded scores for {len(DB_SCORES)} beaches. Last data: {LAST_UPDATE}")
+    """Carrega dados para a RAM no arranque (ver store.py)."""
+    store.warm()
+    # As fases são do arranque; um /reload não acrescenta outra
+    if not startup.READY.is_set():
+        startup.mark("load data")
+    startup.READY.set()
+    startup.ERROR = None
+    scores = store.load_scores()
+    print(f"Loaded {len(store.load_beaches())} beaches, scores for {len(scores.by_beach)} beaches. Last data: {scores.last_update}")
 
-# --- LIFESPAN ---
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    load_data()
-    yield
-    # Shutdown (se precisares de fechar conexões DB)
-    pass
+def load_data_background():
+    # Numa thread uma exceção perdia-se: fica registada para /health e /startup
+    try:
+        load_data()
+    except Exception as e:
+        startup.fail(e)
+        traceback.print_exc()
 
-app = FastAPI(title="PraiaFinder Pro", version="1.0.0", lifespan=lifespan)
+def top_from_cube(beaches: List[Beach], zone: str, target_h: int, mode: str,
+                  water: str, limit: int, weights: Dict[str, float] | None = None) -> List[BeachScore] | None:
+    """Slice do cubo pré-calculado; None se não houver cubo para este pedido.
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    Modos do batch com pesos por omissão usam o ranking guardado; pesos
+    custom ou modos novos recalculam a nota a partir das componentes.
+    """
+    cube = store.load_cube()
+    base = get_profile(mode).base
+    if cube is None or not cube.has(zone, base):
+        return None
+    # Cubo de outro run (ex: scores reescritos com --no-cube): só o ao vivo é fiável
+    if not cube.matches(store.load_scores().version):
+        return None
+    h = cube.hour_index(target_h)
+    if h is None:
+        return None
 
-# --- ENDPOINTS ---
+    aligned = store.cube_beaches(cube, beaches)
+    plane = cube.plane(base, h)
+    used_ts = timeslots.to_datetime(cube.hours[h]).isoformat()
+    ranked = cube.ranked(zone, base, h)
+    notas: Dict[int, float | None] = {}
+    if weights is not None or mode != base:
+        from .cube import weighted
+        members = sorted(ranked)  # ordem do catálogo para os empates
+        notas = dict(zip(members, weighted(cube.components(base, h), weights or get_profile(mode).weights, members)))
+        ranked = sorted(members, key=lambda i: -(notas[i] or 0.0))
 
-@app.get("/health")
-def health():
-    return {
-        "status": "ok", 
-        "beaches": len(DB_BEACHES), 
-        "scores_cached": len(DB_SCORES),
-        "last_data": LAST_UPDATE.isoformat() if LAST_UPDATE else None
-    }
+    results = []
+    for i in ranked:
+        if len(results) >= limit:
+            break
+        b = aligned[i]
+        if b is None or (water != "all" and b.water_type != water):
+            continue
+        nota, breakdown = cube.entry(plane, i)
+        if notas: nota = notas[i]
+        results.append(BeachScore(
+            beach_id=b.id,
+            nome=b.nome,
+            nota=nota or 0.0,
+            distancia_km=None,
+            water_type=b.water_type,
+            breakdown=breakdown,
+            used_timestamp=used_ts if nota is not None else None
+        ))
+    return results
 
-@app.get("/reload")
-def reload_data():
-    load_data()
-    return {"status": "reloaded"}
+def stored_score(item: dict, mode: str, weights: Dict[str, float] | None) -> Tuple[float | None, Dict[str, float]]:
+    """Nota gravada pelo batch; pesos custom ou modos novos recombinam as componentes gravadas."""
+    breakdown = item.get("breakdown") or {}
+    if weights is None and mode == item.get("mode"):
+        return item.get("nota"), breakdown
+    comp = item.get("components")
+    if comp is None:
+        # scores escrito antes das componentes: sem nota até ao próximo batch
+        return None, breakdown
+    return combine_stored(comp, weights or get_profile(mode).weights), breakdown
 
-@app.get("/beaches")
-def get_beaches():
-    # Retorna JSON leve para frontend (cache first)
-    return [b.model_dump(exclude={'dist_km'}) for b in DB_BEACHES]
+def top_live(beaches: List[Beach], lat: float | None, lon: float | None, radius_km: int,
+             zone: str | None, target_h: int, mode: str, water: str, order: str, limit: int,
+             weights: Dict[str, float] | None = None) -> List[BeachScore]:
+    """/top a partir dos scores do batch (mesma fonte que o cubo, sem re-scoring)."""
+    scores = store.load_scores().by_beach
+    base = get_profile(mode).base
 
-@app.get("/top", response_model=List[BeachScore])
-def get_top_beaches(
-    lat: float | None = None,
-    lon: float | None = None,
-    radius_km: int = 50,
-    zone: str | None = None,
-    when: str | None = None,
-    mode: Mode = "familia",
-    water: WaterFilter = "all",
-    order: SortOrder = "nota",
-    limit: int = 20
-):
     # 1. Filtrar Praias (Geo ou Zona)
     candidates = []
     
     if lat is not None and lon is not None:
         # Geo Search
-        for b in DB_BEACHES:
+        for b in beaches:
             dist = haversine(lat, lon, b.lat, b.lon)
             if dist <= radius_km:
                 # Copia leve para não alterar o objeto global
@@ -140,74 +124,43 @@ def get_top_beaches(
     elif zone:
         # Zone Search
         z = zone.lower()
-        for b in DB_BEACHES:
+        for b in beaches:
             if z in [t.lower() for t in b.zone_tags]:
                 b_copy = b.model_copy()
                 b_copy.dist_km = None # Zona não tem distância relativa definida
                 candidates.append(b_copy)
     else:
         # Default: mostra tudo (pode ser pesado, limita-se depois)
-        candidates = [b.model_copy() for b in DB_BEACHES]
+        candidates = [b.model_copy() for b in beaches]
 
     # 2. Filtrar por Tipo de Água
     if water != "all":
         candidates = [b for b in candidates if b.water_type == water]
 
-    # 3. Calcular Scores
+    # 3. Notas do batch
     results = []
     
-    # Target Timestamp
-    target_ts = datetime.now(timezone.utc)
-    if when:
-        try:
-            target_ts = datetime.fromisoformat(when.replace("Z", "+00:00"))
-        except: pass
-        
     for b in candidates:
-        # Buscar dados meteo
-        beach_data = DB_SCORES.get(b.id)
+        # Série do modo base (o batch grava familia e surf)
+        beach_data = scores.get(b.id, {}).get(base)
         
-        nota = 0.0
+        nota = None
         breakdown = {}
         used_ts = None
         
         if beach_data:
-            # Encontrar slot temporal mais próximo (Binary Search O(log n))
-            times = [x[0] for x in beach_data]
-            idx = bisect_left(times, target_ts)
-            
-            # Escolher o mais próximo entre idx e idx-1
-            best_entry = None
-            if idx < len(beach_data):
-                best_entry = beach_data[idx]
-            elif len(beach_data) > 0:
-                best_entry = beach_data[-1]
-                
-            if best_entry:
-                ts, raw_data = best_entry
-                used_ts = ts.isoformat()
-                
-                # Converter raw JSON em objeto Conditions
-                # Adapta estas chaves ao teu JSON real do OpenMeteo
-                cond = Conditions(
-                    wind_speed_kmh=raw_data.get("wind_speed", 0) * 3.6, # m/s -> km/h se necessário
-                    wind_from_deg=raw_data.get("wind_deg", 0),
-                    wave_height_m=raw_data.get("wave_height"),
-                    wave_period_s=raw_data.get("wave_period"),
-                    cloud_pct=raw_data.get("cloud_cover"),
-                    precip_mm=raw_data.get("precip"),
-                    air_temp_c=raw_data.get("temp"),
-                    water_temp_c=raw_data.get("water_temp")
-                )
-                
-                b_info = BeachInfo(orientation_deg=b.orientation_deg, water_type=b.water_type)
-                nota, breakdown = calculate_score(b_info, cond, mode=mode)
+            # Primeiro slot >= hora pedida, ou o último (Binary Search O(log n))
+            idx = bisect_left(beach_data, target_h, key=lambda x: x[0])
+            h, item = beach_data[min(idx, len(beach_data) - 1)]
+            nota, breakdown = stored_score(item, mode, weights)
+            if nota is not None:
+                used_ts = timeslots.to_datetime(h).isoformat()
 
         # Adicionar ao resultado
         results.append(BeachScore(
             beach_id=b.id,
             nome=b.nome,
-            nota=nota,
+            nota=nota or 0.0,
             distancia_km=b.dist_km,
             water_type=b.water_type,
             breakdown=breakdown,
@@ -221,4 +174,125 @@ def get_top_beaches(
     else:
         results.sort(key=lambda x: x.nota, reverse=True)
         
-    return results[:limit]
\ No newline at end of file
+    return results[:limit]
+
+# --- LIFESPAN ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: carregar em background para o /health responder logo
+    # (o Render mata o serviço se o health check não responder a tempo).
+    # Pedidos a /top antes disso esperam pelo lock do store.
+    startup.mark("app startup")
+    threading.Thread(target=load_data_background, name="load_data", daemon=True).start()
+    yield
+    # Shutdown (se precisares de fechar conexões DB)
+    pass
+
+app = FastAPI(title="PraiaFinder Pro", version="1.0.0", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# --- ENDPOINTS ---
+
+@app.get("/health")
+def health():
+    # Não força leituras: mostra só o que já está em cache
+    scores = store.SCORES.peek(store.ScoreIndex())
+    return {
+        "status": "ok", 
+        "ready": startup.READY.is_set(),
+        "error": startup.ERROR,
+        "beaches": len(store.BEACHES.peek([])), 
+        "scores_cached": len(scores.by_beach),
+        "last_data": scores.last_update.isoformat() if scores.last_update else None,
+        "store": store.stats(),
+    }
+
+@app.get("/startup")
+def startup_profile():
+    return startup.report()
+
+@app.get("/reload")
+def reload_data():
+    store.invalidate_all()
+    load_data()
+    return {"status": "reloaded"}
+
+@app.get("/beaches")
+def get_beaches(request: Request, response: Response):
+    # Retorna JSON leve para frontend (cache first)
+    etag = httpcache.make_etag(store.version(("beaches",)), {"path": "beaches"})
+    cache_headers = httpcache.headers(etag, httpcache.max_age(store.SCORES.mtime))
+    if httpcache.not_modified(request, etag):
+        return httpcache.response_304(cache_headers)
+    response.headers.update(cache_headers)
+    return [b.model_dump(exclude={'dist_km'}) for b in store.load_beaches()]
+
+@app.get("/top", response_model=List[BeachScore])
+def get_top_beaches(
+    request: Request,
+    response: Response,
+    lat: float | None = None,
+    lon: float | None = None,
+    radius_km: int = 50,
+    zone: str | None = None,
+    when: str | None = None,
+    mode: Mode = "familia",
+    water: WaterFilter = "all",
+    order: SortOrder = "nota",
+    limit: int = 20,
+    # Pesos custom (substituem os do modo e são normalizados para somar 1)
+    w_vento: float | None = None,
+    w_meteo: float | None = None,
+    w_ondas: float | None = None,
+    w_agua: float | None = None,
+):
+    # limit <= 0 não tem sentido (e o cubo e o ao vivo cortavam de forma diferente)
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit tem de ser >= 1")
+
+    weights = None
+    overrides = {"vento": w_vento, "meteo": w_meteo, "ondas": w_ondas, "agua": w_agua}
+    if any(v is not None for v in overrides.values()):
+        try:
+            weights = custom_weights(mode, overrides)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Pesos iguais aos do modo: nota do batch (e ranking do cubo), como sem w_*
+        if weights == get_profile(mode).weights:
+            weights = None
+
+    # Target Timestamp (epoch-hour: primeira hora >= when)
+    target_h, now_based = timeslots.now_hour(ceil=True), True
+    if when:
+        try:
+            target_h, now_based = timeslots.parse_hour(when, ceil=True), False
+        except: pass
+
+    # Cache HTTP: ETag da versão dos dados + query normalizada; 304 sem correr a query
+    etag = httpcache.make_etag(store.version(), {
+        "lat": lat, "lon": lon, "radius_km": radius_km, "zone": zone.lower() if zone else None,
+        "h": target_h, "mode": mode, "water": water, "order": order, "limit": limit,
+        "w": tuple(sorted(weights.items())) if weights else None,
+    })
+    # Sem 'when' a resposta muda quando o "agora" passa para a hora seguinte
+    until = target_h * 3600 if now_based else None
+    cache_headers = httpcache.headers(etag, httpcache.max_age(store.SCORES.mtime, until=until))
+    if httpcache.not_modified(request, etag):
+        return httpcache.response_304(cache_headers)
+    response.headers.update(cache_headers)
+
+    beaches = store.load_beaches()
+
+    # 0. Zona ordenada por nota: resposta direta do cubo do batch (sem scoring)
+    if zone and (lat is None or lon is None) and order == "nota":
+        cached = top_from_cube(beaches, zone.lower(), target_h, mode, water, limit, weights)
+        if cached is not None:
+            return cached
+
+    return top_live(beaches, lat, lon, radius_km, zone, target_h, mode, water, order, limit, weights)
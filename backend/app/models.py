@@ -1,8 +1,8 @@
 from typing import Literal, List, Optional, Dict, Any
 from pydantic import BaseModel, Field
 
-# Modos suportados
-Mode = Literal["familia", "surf"]
+# Modos suportados (pesos em scoring.PROFILES)
+Mode = Literal["familia", "surf", "sem_vento"]
 WaterType = Literal["mar", "fluvial"]
 WaterFilter = Literal["all", "mar", "fluvial"]
 SortOrder = Literal["nota", "dist"]
@@ -1,13 +1,26 @@
 from pathlib import Path
+from typing import Iterable
 import json
 
-DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"
 SCORES_PATH = DATA_DIR / "scores_demo.json"
 
 class LocalRepo:
+    def __init__(self, path: Path | str = SCORES_PATH):
+        self.path = Path(path)
+
     def upsert_score(self, item: dict):
+        self.upsert_many([item])
+
+    def upsert_many(self, items: Iterable[dict]) -> int:
+        """Uma leitura e uma escrita por lote (em vez de uma por item)."""
         data = []
-        if SCORES_PATH.exists():
-            data = json.loads(SCORES_PATH.read_text("utf-8"))
-        data.append(item)
-        SCORES_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), "utf-8")
+        if self.path.exists():
+            data = json.loads(self.path.read_text("utf-8"))
+        before = len(data)
+        data.extend(items)
+        # Formato compacto: o indent=2 quase triplicava o ficheiro
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), "utf-8")
+        tmp.replace(self.path)
+        return len(data) - before
@@ -0,0 +1,162 @@
+from pathlib import Path
+from typing import Iterable, Iterator, List, Tuple
+import json, sqlite3
+
+DATA_DIR = Path(__file__).resolve().parents[3] / "data"
+SCORES_DB_PATH = DATA_DIR / "scores.db"
+
+# Uma linha por (praia, modo, hora). O item completo vai em 'payload' para o
+# loader devolver exatamente o mesmo dict que o scores.json.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    beach_id TEXT NOT NULL,
+    mode     TEXT NOT NULL,
+    ts       TEXT NOT NULL,
+    nota     REAL,
+    payload  TEXT NOT NULL,
+    PRIMARY KEY (beach_id, mode, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS scores_ts ON scores (ts);
+-- 'version': run do batch que escreveu a tabela toda (o cubo guarda-a)
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+UPSERT = """
+INSERT INTO scores (beach_id, mode, ts, nota, payload) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (beach_id, mode, ts) DO UPDATE SET nota = excluded.nota, payload = excluded.payload
+"""
+
+def _row(item: dict) -> tuple:
+    return (
+        item["beach_id"], item.get("mode", "familia"), item["ts"], item.get("nota"),
+        json.dumps(item, ensure_ascii=False, separators=(",", ":")),
+    )
+
+class SQLiteRepo:
+    """Scores em SQLite embebido (WAL). Alternativa aos ficheiros JSON planos."""
+
+    def __init__(self, path: Path | str = SCORES_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Escrita ---
+    def upsert_score(self, item: dict):
+        self.upsert_many([item])
+
+    def upsert_many(self, items: Iterable[dict], batch_size: int = 5000) -> int:
+        """Insere/atualiza em lotes, uma transação por lote."""
+        n = 0
+        batch: List[tuple] = []
+        for item in items:
+            batch.append(_row(item))
+            if len(batch) >= batch_size:
+                with self.conn:
+                    self.conn.executemany(UPSERT, batch)
+                    self._set_version(None)
+                n += len(batch)
+                batch = []
+        if batch:
+            with self.conn:
+                self.conn.executemany(UPSERT, batch)
+                self._set_version(None)
+            n += len(batch)
+        return n
+
+    def _write_batches(self, items: Iterable[dict], batch_size: int) -> int:
+        # Sem commit: quem chama decide a transação
+        n = 0
+        batch: List[tuple] = []
+        for item in items:
+            batch.append(_row(item))
+            if len(batch) >= batch_size:
+                self.conn.executemany(UPSERT, batch)
+                n += len(batch)
+                batch = []
+        if batch:
+            self.conn.executemany(UPSERT, batch)
+            n += len(batch)
+        return n
+
+    def _set_version(self, version: str | None):
+        # Escritas parciais apagam a versão: o cubo deixa de corresponder
+        if version is None:
+            self.conn.execute("DELETE FROM meta WHERE key = 'version'")
+        else:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('version', ?)", (version,))
+
+    def replace_all(self, items: Iterable[dict], batch_size: int = 5000, version: str | None = None) -> int:
+        """Substitui o conteúdo todo (equivalente a reescrever o scores.json).
+
+        DELETE e inserts numa só transação: em WAL os leitores (backend) veem
+        a tabela antiga até ao commit, nunca uma vazia ou a meio. 'version'
+        identifica este conteúdo (ver store.ScoreIndex.version).
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM scores")
+            n = self._write_batches(items, batch_size)
+            self._set_version(version)
+            return n
+
+    # --- Leitura ---
+    def _payloads(self, sql: str, params: tuple = ()) -> Iterator[dict]:
+        for (payload,) in self.conn.execute(sql, params):
+            yield json.loads(payload)
+
+    def all_scores(self) -> List[dict]:
+        return list(self._payloads("SELECT payload FROM scores ORDER BY beach_id, mode, ts"))
+
+    def scores_between(self, beach_id: str, mode: str, start: str | None = None, end: str | None = None) -> List[dict]:
+        """Scores de uma praia/modo com start <= ts <= end (ISO UTC, 'Z')."""
+        sql = "SELECT payload FROM scores WHERE beach_id = ? AND mode = ?"
+        params: list = [beach_id, mode]
+        if start is not None:
+            sql += " AND ts >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND ts <= ?"
+            params.append(end)
+        return list(self._payloads(sql + " ORDER BY ts", tuple(params)))
+
+    def scores_at(self, ts: str, mode: str | None = None) -> List[dict]:
+        """Todas as praias numa hora (opcionalmente só um modo)."""
+        if mode is None:
+            return list(self._payloads("SELECT payload FROM scores WHERE ts = ? ORDER BY beach_id, mode", (ts,)))
+        return list(self._payloads(
+            "SELECT payload FROM scores WHERE ts = ? AND mode = ? ORDER BY beach_id", (ts, mode)))
+
+    def delete_before(self, ts: str) -> int:
+        with self.conn:
+            n = self.conn.execute("DELETE FROM scores WHERE ts < ?", (ts,)).rowcount
+            if n: self._set_version(None)
+            return n
+
+    def version(self) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else None
+
+    def all_scores_with_version(self) -> Tuple[List[dict], str | None]:
+        """all_scores() e version() lidos na mesma transação (coerentes entre si)."""
+        self.conn.execute("BEGIN")
+        try:
+            return self.all_scores(), self.version()
+        finally:
+            self.conn.commit()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
@@ -18,6 +18,66 @@ class Conditions:
     air_temp_c: float | None = None
     water_temp_c: float | None = None
 
+@dataclass
+class Components:
+    """Componentes 0..1 antes da ponderação + o teto de temperatura (0..10)."""
+    vento: float
+    meteo: float
+    ondas: float
+    agua: float
+    cap: float
+    offshore: float
+
+COMPONENTS = ("vento", "meteo", "ondas", "agua")
+
+@dataclass(frozen=True)
+class Profile:
+    base: str                  # "familia" ou "surf": como as componentes e o cap são calculados
+    weights: Dict[str, float]  # A ordem das chaves é a ordem da soma (floats idênticos aos de sempre)
+
+PROFILES: Dict[str, Profile] = {
+    "familia": Profile("familia", {"meteo": 0.50, "vento": 0.30, "ondas": 0.15, "agua": 0.05}),
+    "surf": Profile("surf", {"ondas": 0.5, "vento": 0.3, "meteo": 0.1, "agua": 0.1}),
+    # "Não quero saber do vento"
+    "sem_vento": Profile("familia", {"meteo": 0.65, "vento": 0.0, "ondas": 0.25, "agua": 0.10}),
+}
+
+def get_profile(mode: str) -> Profile:
+    return PROFILES.get(mode, PROFILES["familia"])
+
+def custom_weights(mode: str, overrides: Dict[str, float | None]) -> Dict[str, float]:
+    """Pesos do modo com as chaves indicadas substituídas, normalizados para somar 1."""
+    w = dict(get_profile(mode).weights)
+    for k, v in overrides.items():
+        if k in w and v is not None:
+            if not math.isfinite(v):
+                raise ValueError(f"Peso inválido para {k}: {v}")
+            w[k] = max(0.0, v)
+    total = sum(w.values())
+    if not math.isfinite(total):
+        raise ValueError("Pesos demasiado grandes")
+    if total <= 0:
+        raise ValueError("Pelo menos um peso tem de ser > 0")
+    return {k: v / total for k, v in w.items()}
+
+def combine(comp: Components, weights: Dict[str, float]) -> float:
+    """Nota final 0..10 (produto interno componentes x pesos, limitado pelo cap)."""
+    final = sum(getattr(comp, k) * w for k, w in weights.items())
+    return round(min(final * 10.0, comp.cap), 1)
+
+# Componentes gravadas pelo batch em cada item (scores.json/db e cubo)
+STORED_COMPONENTS = ("vento", "meteo", "ondas", "agua", "cap")
+
+def stored_components(comp: Components) -> Dict[str, float]:
+    """Componentes sem arredondar (o JSON guarda floats exatos): com os pesos do
+    modo, combine_stored dá exatamente a nota do batch."""
+    return {k: getattr(comp, k) for k in STORED_COMPONENTS}
+
+def combine_stored(c: Dict[str, float], weights: Dict[str, float]) -> float:
+    """combine() sobre as componentes gravadas (pesos custom e modos novos)."""
+    final = sum(c[k] * w for k, w in weights.items())
+    return round(min(final * 10.0, c["cap"]), 1)
+
 def clamp(x: float, mn=0.0, mx=1.0) -> float:
     return max(mn, min(mx, x))
 
@@ -32,8 +92,8 @@ def calc_offshore_factor(wind_dir: float | None, beach_ori: float | None) -> flo
     diff = abs((wind_dir - beach_ori + 180) % 360 - 180)
     return (1 - math.cos(math.radians(diff))) / 2.0
 
-def calculate_score(beach: BeachInfo, c: Conditions, mode: str = "familia") -> Tuple[float, Dict[str, float]]:
-    
+def score_components(beach: BeachInfo, c: Conditions, mode: str = "familia") -> Components:
+    if mode in PROFILES: mode = PROFILES[mode].base
     air_temp = c.air_temp_c or 15.0
     wind_spd = c.wind_speed_kmh
     
@@ -118,27 +178,29 @@ def calculate_score(beach: BeachInfo, c: Conditions, mode: str = "familia") -> T
     if c.water_temp_c:
         score_agua = interpolate(c.water_temp_c, 14, 0.2, 22, 1.0)
 
-    # --- FINAL ---
-    if mode == "surf":
-        final = (score_ondas * 0.5) + (score_vento * 0.3) + (score_meteo * 0.1) + (score_agua * 0.1)
-    else:
-        final = (score_meteo * 0.50) + (score_vento * 0.30) + (score_ondas * 0.15) + (score_agua * 0.05)
+    return Components(score_vento, score_meteo, score_ondas, score_agua, score_cap, offshore)
 
-    final_score = min(final * 10.0, score_cap)
-    
+def make_breakdown(comp: Components, water_type: str, mode: str) -> Dict[str, float]:
     # --- FIX 3: Limpar Breakdown para UI ---
     breakdown = {
-        "vento": round(score_vento * 10, 1),
-        "meteo": round(score_meteo * 10, 1),
-        "agua": round(score_agua * 10, 1),
+        "vento": round(comp.vento * 10, 1),
+        "meteo": round(comp.meteo * 10, 1),
+        "agua": round(comp.agua * 10, 1),
     }
     
     # Só mostramos ondas se for mar
-    if beach.water_type == "mar":
-        breakdown["ondas"] = round(score_ondas * 10, 1)
+    if water_type == "mar":
+        breakdown["ondas"] = round(comp.ondas * 10, 1)
         
     # Só mostramos Offshore se for Surf (Família não quer saber)
-    if mode == "surf" and beach.water_type == "mar":
-        breakdown["offshore"] = round(offshore * 10, 1)
+    if get_profile(mode).base == "surf" and water_type == "mar":
+        breakdown["offshore"] = round(comp.offshore * 10, 1)
         
-    return round(final_score, 1), breakdown
\ No newline at end of file
+    return breakdown
+
+def calculate_score(beach: BeachInfo, c: Conditions, mode: str = "familia",
+                    weights: Dict[str, float] | None = None) -> Tuple[float, Dict[str, float]]:
+    comp = score_components(beach, c, mode)
+    # --- FINAL ---
+    final_score = combine(comp, weights or get_profile(mode).weights)
+    return final_score, make_breakdown(comp, beach.water_type, mode)
\ No newline at end of file
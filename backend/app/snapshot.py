@@ -0,0 +1,85 @@
+# backend/app/snapshot.py
+"""
+Snapshot binário (pickle) dos artefactos de arranque já construídos.
+
+Evita o json.loads + validação pydantic no cold start. Gerar depois de cada
+batch (ou no build do Render):
+
+    python -m backend.app.snapshot
+
+Cada entrada guarda tamanho, mtime e sha1 do ficheiro de origem; se a origem
+mudou o store ignora a entrada e volta a ler o ficheiro.
+"""
+from pathlib import Path
+from typing import Any, Dict
+import hashlib, os, pickle, sys, time
+
+FORMAT = 4
+
+def _versions() -> tuple:
+    # Objetos pydantic em pickle só são fiáveis com as mesmas versões
+    import pydantic
+    return (FORMAT, sys.version_info[:2], pydantic.VERSION)
+
+def _sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def matches(entry: Dict[str, Any], path: Path) -> bool:
+    """A entrada ainda corresponde ao ficheiro? Sem origem no disco, o snapshot manda."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return True
+    if st.st_size != entry["size"]:
+        return False
+    if st.st_mtime_ns == entry["mtime_ns"]:
+        return True
+    # mtime muda com git checkout / cópia no deploy: confirmar pelo conteúdo
+    return _sha1(path) == entry["sha1"]
+
+def read(path: Path) -> Dict[str, Dict[str, Any]] | None:
+    if not path.exists():
+        return None
+    try:
+        with path.open("rb") as f:
+            data = pickle.load(f)
+    except Exception as e:
+        print(f"Snapshot ignorado ({path}): {e}")
+        return None
+    if data.get("versions") != _versions():
+        return None
+    return data["artifacts"]
+
+def build(path: Path | None = None, names=None) -> Dict[str, Any]:
+    from . import store
+    path = Path(path or store.SNAPSHOT_PATH)
+    names = names or store.STARTUP_ARTIFACTS
+
+    artifacts = {}
+    for n in names:
+        a = store.ARTIFACTS[n]
+        if not a.path.exists(): continue
+        st = a.path.stat()
+        artifacts[n] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha1": _sha1(a.path),
+            "value": a._load(a.path)[0],
+        }
+
+    data = {"versions": _versions(), "created": time.time(), "artifacts": artifacts}
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return data
+
+if __name__ == "__main__":
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else None
+    t0 = time.perf_counter()
+    data = build(out)
+    print(f"✓ Snapshot com {', '.join(data['artifacts']) or 'nada'} em {time.perf_counter() - t0:.2f}s")
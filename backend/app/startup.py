@@ -0,0 +1,59 @@
+# backend/app/startup.py
+"""
+Perfil de arranque (cold start no Render).
+
+main.py marca as fases (imports, carregamento) com mark(); o relatório fica
+em GET /startup. Para ver o perfil sem servidor:
+
+    python -m backend.app.startup
+"""
+import threading, time
+
+T0 = time.perf_counter()
+_last = T0
+PHASES: list[tuple[str, float]] = []  # (fase, segundos)
+READY = threading.Event()
+ERROR: str | None = None  # último erro do carregamento em background
+
+def mark(name: str):
+    """Fecha a fase 'name' (tempo desde a marca anterior)."""
+    global _last
+    now = time.perf_counter()
+    PHASES.append((name, round(now - _last, 4)))
+    _last = now
+
+def fail(exc: BaseException):
+    """Regista um erro do carregamento (fica visível em /health e /startup)."""
+    global ERROR
+    ERROR = f"{type(exc).__name__}: {exc}"
+
+def report() -> dict:
+    from . import store
+    return {
+        "ready": READY.is_set(),
+        "error": ERROR,
+        "since_import_s": round(time.perf_counter() - T0, 4),
+        "phases": [{"phase": n, "seconds": s} for n, s in PHASES],
+        "artifacts": {
+            n: {k: st[k] for k in ("source", "load_seconds", "bytes_loaded")}
+            for n, st in store.stats().items()
+        },
+    }
+
+def print_report():
+    r = report()
+    print(f"Startup profile (ready={r['ready']}, {r['since_import_s']:.3f}s desde o import):")
+    if r["error"]:
+        print(f"  erro: {r['error']}")
+    for p in r["phases"]:
+        print(f"  {p['phase']:<24} {p['seconds'] * 1000:9.1f} ms")
+    for n, a in r["artifacts"].items():
+        secs = a["load_seconds"] or 0.0
+        print(f"  load {n:<19} {secs * 1000:9.1f} ms  ({a['source']}, {a['bytes_loaded']} bytes)")
+
+if __name__ == "__main__":
+    # Como __main__ este módulo é uma cópia; as marcas ficam em backend.app.startup
+    from .main import load_data
+    from . import startup
+    load_data()
+    startup.print_report()
@@ -1,28 +1,264 @@
 # backend/app/store.py
+"""
+Camada única de acesso aos dados (main.py e scripts usam só isto).
+
+Cada ficheiro é um Artifact com cache e invalidação próprias: mudar o
+scores.json não obriga a reler o beaches.json. A verificação de frescura é
+um stat() barato, no máximo uma vez a cada STAT_INTERVAL_S segundos, e nada
+é lido antes do primeiro get().
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-import time, json
+from typing import Any, Callable, Dict, List, Tuple
+import hashlib, json, os, threading, time
+
+from .models import Beach
+from . import catalogue, timeslots
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
-BEACHES = DATA_DIR / "beaches.json"
-SCORES  = DATA_DIR / "scores_demo.json"
-
-_cache = {}
-
-def _load_json(path: Path):
-    return json.loads(path.read_text("utf-8"))
-
-def load_beaches():
-    m = BEACHES.stat().st_mtime if BEACHES.exists() else 0
-    k = ("beaches", m)
-    if k not in _cache:
-        _cache.clear()
-        _cache[k] = _load_json(BEACHES) if BEACHES.exists() else []
-    return _cache[k]
-
-def load_scores():
-    m = SCORES.stat().st_mtime if SCORES.exists() else 0
-    k = ("scores", m)
-    if k not in _cache:
-        _cache.clear()
-        _cache[k] = _load_json(SCORES) if SCORES.exists() else []
-    return _cache[k], m  # devolve mtime para "data_source_time"
+BEACHES_PATH = catalogue.default_path()
+SCORES_PATH = Path(os.getenv("SCORES_PATH", DATA_DIR / "scores.json"))
+CUBE_PATH = Path(os.getenv("CUBE_PATH", DATA_DIR / "cube.bin"))
+SCORES_DB_PATH = Path(os.getenv("SCORES_DB_PATH", DATA_DIR / "scores.db"))
+# "json" (scores.json) ou "sqlite" (scores.db escrito com fetch_and_score --sqlite)
+SCORES_BACKEND = os.getenv("SCORES_BACKEND", "json").lower()
+STAT_INTERVAL_S = float(os.getenv("STORE_STAT_INTERVAL_S", "5"))
+# Snapshot binário (python -m backend.app.snapshot); "" desativa
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", str(DATA_DIR / "snapshot.pkl"))
+
+_MISSING = object()
+
+def _stat_key(paths: Tuple[Path, ...]):
+    key = []
+    for p in paths:
+        try:
+            st = p.stat()
+            key.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            key.append(None)
+    return tuple(key)
+
+class Artifact:
+    """Um ficheiro de dados e o valor construído a partir dele."""
+
+    def __init__(self, name: str, path: Path, load: Callable[[Path], Tuple[Any, int]],
+                 empty: Callable[[], Any], watch: Tuple[Path, ...] = ()):
+        self.name = name
+        self.path = path
+        self._load = load      # path -> (valor, bytes lidos)
+        self._empty = empty    # valor quando o ficheiro não existe
+        self._watch = (path,) + tuple(watch)
+        self._lock = threading.Lock()
+        self._value: Any = _MISSING
+        self._key = None
+        self._fp = None        # último stat() e quando foi feito
+        self._fp_checked = 0.0
+        self.parse_count = 0
+        self.bytes_loaded = 0
+        self.loaded_at: float | None = None
+        self.load_seconds: float | None = None
+        self.source: str | None = None  # "file", "snapshot" ou "empty"
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not _MISSING
+
+    @property
+    def mtime(self) -> float:
+        return self.path.stat().st_mtime if self.path.exists() else 0
+
+    def fingerprint(self) -> tuple:
+        """stat() dos ficheiros, no máximo uma vez a cada STAT_INTERVAL_S (não lê nada)."""
+        now, fp = time.monotonic(), self._fp
+        if fp is None or now - self._fp_checked >= STAT_INTERVAL_S:
+            fp = _stat_key(self._watch)
+            self._fp, self._fp_checked = fp, now
+        return fp
+
+    def get(self) -> Any:
+        key = self.fingerprint()
+        # Uma só leitura: um invalidate() concorrente (/reload) não pode trocar o valor a meio
+        value, value_key = self._value, self._key
+        if value is not _MISSING and key == value_key:
+            return value
+        with self._lock:
+            if self._value is _MISSING or key != self._key:
+                t0 = time.perf_counter()
+                value = _from_snapshot(self)
+                if value is not _MISSING:
+                    self.source = "snapshot"
+                elif self.path.exists():
+                    value, n_bytes = self._load(self.path)
+                    self.parse_count += 1
+                    self.bytes_loaded += n_bytes
+                    self.source = "file"
+                else:
+                    value = self._empty()
+                    self.source = "empty"
+                self._value, self._key = value, key
+                self.loaded_at = time.time()
+                self.load_seconds = round(time.perf_counter() - t0, 4)
+            return self._value
+
+    def peek(self, default: Any = None) -> Any:
+        """Valor em cache, sem ler nem verificar o disco."""
+        return default if self._value is _MISSING else self._value
+
+    def invalidate(self):
+        with self._lock:
+            self._value, self._key, self._fp = _MISSING, None, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "loaded": self.loaded,
+            "parse_count": self.parse_count,
+            "bytes_loaded": self.bytes_loaded,
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "source": self.source,
+        }
+
+# --- Snapshot ---
+_snapshot: Dict[str, Any] | None = None
+
+def _from_snapshot(a: Artifact) -> Any:
+    """Valor do snapshot se ainda corresponder ao ficheiro de origem; senão _MISSING."""
+    global _snapshot
+    if not SNAPSHOT_PATH:
+        return _MISSING
+    if _snapshot is None:
+        from . import snapshot
+        _snapshot = snapshot.read(Path(SNAPSHOT_PATH)) or {}
+    entry = _snapshot.get(a.name)
+    if entry is None:
+        return _MISSING
+    from . import snapshot
+    if not snapshot.matches(entry, a.path):
+        return _MISSING
+    # Um uso só: a partir daqui o ficheiro manda
+    _snapshot.pop(a.name)
+    return entry["value"]
+
+# --- Construtores ---
+def _read_json(path: Path) -> Tuple[Any, int]:
+    raw = path.read_bytes()
+    return json.loads(raw), len(raw)
+
+def _load_beaches(path: Path) -> Tuple[List[Beach], int]:
+    return [Beach(**b) for b in catalogue.iter_beaches(path)], path.stat().st_size
+
+@dataclass
+class ScoreIndex:
+    # beach_id -> modo -> [(hora int, item)] ordenado
+    by_beach: Dict[str, Dict[str, List[tuple]]] = field(default_factory=dict)
+    last_hour: int | None = None
+    # Conteúdo de onde veio (scores_version / run do SQLite); o cubo só serve se for o mesmo
+    version: str | None = None
+
+    @property
+    def last_update(self) -> datetime | None:
+        return None if self.last_hour is None else timeslots.to_datetime(self.last_hour)
+
+def scores_version(raw: bytes) -> str:
+    """Versão de um scores.json (o batch grava-a no header do cubo)."""
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+def index_scores(raw_scores: List[dict], version: str | None = None) -> ScoreIndex:
+    # Indexar scores por ID para lookup O(1)
+    temp_idx: Dict[str, Dict[str, List[tuple]]] = {}
+    last_h = None
+    hour = timeslots.HourCache()
+
+    for s in raw_scores:
+        bid = s.get("beach_id")
+        if not bid: continue
+        try:
+            h = hour(s.get("ts"))
+        except Exception:
+            continue
+        if last_h is None or h > last_h: last_h = h
+        temp_idx.setdefault(bid, {}).setdefault(s.get("mode"), []).append((h, s))
+
+    # Ordenar listas temporais
+    for by_mode in temp_idx.values():
+        for series in by_mode.values():
+            series.sort(key=lambda x: x[0])
+    return ScoreIndex(temp_idx, last_h, version)
+
+def _load_scores_json(path: Path) -> Tuple[ScoreIndex, int]:
+    raw = path.read_bytes()
+    return index_scores(json.loads(raw), scores_version(raw)), len(raw)
+
+def _load_scores_sqlite(path: Path) -> Tuple[ScoreIndex, int]:
+    from .repo.sqlite import SQLiteRepo
+    with SQLiteRepo(path) as repo:
+        raw, version = repo.all_scores_with_version()
+    return index_scores(raw, version), path.stat().st_size
+
+def _load_cube(path: Path):
+    from . import cube
+    try:
+        return cube.read(path)
+    except (ValueError, KeyError) as e:
+        # Cubo de outra versão: o /top volta ao cálculo ao vivo até ao próximo batch
+        print(f"Cubo ignorado ({path}): {e}")
+        return None, 0
+
+# --- Artefactos ---
+BEACHES = Artifact("beaches", BEACHES_PATH, _load_beaches, list)
+if SCORES_BACKEND == "sqlite":
+    # Em WAL as escritas ficam no -wal até ao checkpoint
+    SCORES = Artifact("scores", SCORES_DB_PATH, _load_scores_sqlite, ScoreIndex,
+                      watch=(SCORES_DB_PATH.with_name(SCORES_DB_PATH.name + "-wal"),))
+else:
+    SCORES = Artifact("scores", SCORES_PATH, _load_scores_json, ScoreIndex)
+
+CUBE = Artifact("cube", CUBE_PATH, _load_cube, lambda: None)
+
+ARTIFACTS: Dict[str, Artifact] = {a.name: a for a in (BEACHES, SCORES, CUBE)}
+# Só estes são lidos no arranque; os restantes na primeira utilização
+STARTUP_ARTIFACTS = ("beaches", "scores")
+
+def load_beaches() -> List[Beach]:
+    return BEACHES.get()
+
+def load_scores() -> ScoreIndex:
+    return SCORES.get()
+
+def load_cube():
+    """Cubo pré-calculado pelo batch (None se não existir)."""
+    return CUBE.get()
+
+_cube_beaches: tuple = (None, None, [])  # (beaches, cubo, praias alinhadas)
+
+def cube_beaches(cube, beaches: List[Beach]) -> List[Beach | None]:
+    """Praias na ordem de cube.beach_ids (None se já não estiverem no catálogo).
+
+    Construído uma vez por par catálogo/cubo (os valores dos artefactos só
+    mudam quando o ficheiro muda), não por pedido.
+    """
+    global _cube_beaches
+    b_ref, c_ref, aligned = _cube_beaches
+    if b_ref is not beaches or c_ref is not cube:
+        by_id = {b.id: b for b in beaches}
+        aligned = [by_id.get(bid) for bid in cube.beach_ids]
+        _cube_beaches = (beaches, cube, aligned)
+    return aligned
+
+def warm(names=STARTUP_ARTIFACTS):
+    for n in names:
+        ARTIFACTS[n].get()
+
+def invalidate_all():
+    for a in ARTIFACTS.values():
+        a.invalidate()
+
+def version(names: Tuple[str, ...] = tuple(ARTIFACTS)) -> str:
+    """Versão curta dos dados no disco (para ETags); muda quando algum ficheiro muda."""
+    fp = repr([ARTIFACTS[n].fingerprint() for n in names]).encode()
+    return hashlib.sha1(fp).hexdigest()[:16]
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    return {name: a.stats() for name, a in ARTIFACTS.items()}
@@ -0,0 +1,70 @@
+# backend/app/timeslots.py
+"""
+Horas de previsão como inteiros (horas desde 1970-01-01T00:00Z).
+
+Batch e backend comparam ints em vez de datetime; o ISO só é gerado na
+resposta (to_iso / to_datetime). Os arrays hourly.time do Open-Meteo são
+horas consecutivas, por isso parse_hours só faz parse do primeiro e do
+último elemento.
+"""
+from datetime import date, datetime, timezone
+from typing import Dict, Sequence
+import math
+
+_EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+def _fast(s: str) -> int | None:
+    # "YYYY-MM-DDTHH:MM[:SS]" com sufixo opcional "Z"; minutos/segundos a zero
+    if len(s) < 16 or s[10] != "T" or s[4] != "-" or s[7] != "-":
+        return None
+    tail = s[16:]
+    if tail not in ("", "Z", ":00", ":00Z") or s[13:16] != ":00":
+        return None
+    d = date(int(s[0:4]), int(s[5:7]), int(s[8:10])).toordinal() - _EPOCH_ORD
+    return d * 24 + int(s[11:13])
+
+def from_datetime(dt: datetime, ceil: bool = False) -> int:
+    """datetime -> hora (naive conta como UTC). ceil=True arredonda para cima."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    secs = dt.timestamp()
+    return int(math.ceil(secs / 3600)) if ceil else int(secs // 3600)
+
+def parse_hour(s: str, ceil: bool = False) -> int:
+    """ISO -> hora. Aceita o formato do Open-Meteo/batch e qualquer ISO com offset."""
+    h = _fast(s)
+    if h is not None:
+        return h
+    return from_datetime(datetime.fromisoformat(s.replace("Z", "+00:00")), ceil=ceil)
+
+def parse_hours(times: Sequence[str]) -> Sequence[int]:
+    """Array hourly.time inteiro -> horas, num só passo quando é contíguo."""
+    if not times:
+        return []
+    first, last = parse_hour(times[0]), parse_hour(times[-1])
+    if last - first == len(times) - 1:
+        return range(first, last + 1)
+    return [parse_hour(t) for t in times]
+
+class HourCache:
+    """Parse memoizado: os scores repetem as mesmas ~120 horas em milhares de linhas."""
+
+    def __init__(self):
+        self._seen: Dict[str, int] = {}
+
+    def __call__(self, s: str) -> int:
+        h = self._seen.get(s)
+        if h is None:
+            h = self._seen[s] = parse_hour(s)
+        return h
+
+def now_hour(ceil: bool = False) -> int:
+    return from_datetime(datetime.now(timezone.utc), ceil=ceil)
+
+def to_datetime(h: int) -> datetime:
+    return datetime.fromtimestamp(h * 3600, tz=timezone.utc)
+
+def to_iso(h: int) -> str:
+    """Formato do batch: 2025-07-01T14:00:00Z."""
+    d, hh = divmod(h, 24)
+    return f"{date.fromordinal(d + _EPOCH_ORD).isoformat()}T{hh:02d}:00:00Z"
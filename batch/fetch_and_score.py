@@ -1,26 +1,22 @@
 ﻿from __future__ import annotations
 
 from pathlib import Path
-import os, json, math, random, argparse, datetime as dt, asyncio
+import os, json, math, random, argparse, datetime as dt, asyncio, time
 import httpx
 
 # Hack para importar scoring sem instalar pacote
 import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
-from backend.app.scoring import calculate_score, BeachInfo, Conditions
+from backend.app.scoring import score_components, stored_components, combine, make_breakdown, PROFILES, BeachInfo, Conditions
+from backend.app import cube, catalogue, store, timeslots
 
 # ---------- Constantes ----------
 DATA = Path(__file__).resolve().parents[1] / "data"
-BEACHES_PATH = DATA / "beaches.json"
-BEACHES = json.loads(BEACHES_PATH.read_text("utf-8"))
 
 WX = "https://api.open-meteo.com/v1/forecast"
 MR = "https://marine-api.open-meteo.com/v1/marine"
 
 # ---------- Utils ----------
-def to_utc(s: str) -> dt.datetime:
-    return dt.datetime.fromisoformat(s).replace(tzinfo=dt.timezone.utc)
-
 def round_cell(lat: float, lon: float, res_deg: float = 0.1):
     return (round(lat / res_deg) * res_deg, round(lon / res_deg) * res_deg)
 
@@ -69,12 +65,13 @@ async def process_cell(
     clat: float, clon: float,
     group: list[dict],
     days: int, now: dt.datetime, horizon: dt.datetime,
-    ua: str, skip_marine: bool
+    ua: str, skip_marine: bool,
+    wx_url: str = WX, mr_url: str = MR
 ) -> list[dict]:
     items: list[dict] = []
 
     # 1. Meteo (Ar)
-    wx = await fetch_json(client, WX, {
+    wx = await fetch_json(client, wx_url, {
         "latitude": clat, "longitude": clon, "timezone": "UTC",
         "hourly": ["temperature_2m", "precipitation", "cloudcover", "windspeed_10m", "winddirection_10m"],
         "forecast_days": days
@@ -83,8 +80,11 @@ async def process_cell(
     if not wx or "hourly" not in wx: return []
     
     wxh = wx["hourly"]
-    times = [to_utc(t) for t in wxh["time"]]
-    valid_idx = [i for i, t in enumerate(times) if now <= t <= horizon]
+    # Horas como int (epoch-hour); o ISO só é gerado por item
+    times = timeslots.parse_hours(wxh["time"])
+    lo, hi = timeslots.from_datetime(now, ceil=True), timeslots.from_datetime(horizon)
+    valid_idx = [i for i, t in enumerate(times) if lo <= t <= hi]
+    ts_iso = {i: timeslots.to_iso(times[i]) for i in valid_idx}
     
     if not valid_idx: return []
 
@@ -97,7 +97,7 @@ async def process_cell(
     mrh = {}
     if has_sea and not skip_marine:
         try:
-            mr = await fetch_json(client, MR, {
+            mr = await fetch_json(client, mr_url, {
                 "latitude": clat, "longitude": clon, "timezone": "UTC", "cell_selection": "nearest",
                 "hourly": ["wave_height", "wave_direction", "wave_period", "sea_surface_temperature"],
                 "forecast_days": days
@@ -122,8 +122,6 @@ async def process_cell(
         use_marine = (wt == "mar" and bool(mrh))
 
         for i in valid_idx:
-            ts_iso = times[i].isoformat().replace("+00:00", "Z")
-            
             cond = Conditions(
                 wind_speed_kmh=wxh["windspeed_10m"][i] or 0.0,
                 wind_from_deg=wxh["winddirection_10m"][i] or 0.0,
@@ -139,7 +137,9 @@ async def process_cell(
             for mode in ["familia", "surf"]:
                 if mode == "surf" and wt == "fluvial": continue
                 
-                nota, breakdown = calculate_score(beach_info, cond, mode=mode)
+                comp = score_components(beach_info, cond, mode=mode)
+                nota = combine(comp, PROFILES[mode].weights)
+                breakdown = make_breakdown(comp, wt, mode)
                 
                 # Limpeza final de keys
                 if wt == "fluvial":
@@ -148,7 +148,7 @@ async def process_cell(
                 
                 items.append({
                     "beach_id": b["id"],
-                    "ts": ts_iso,
+                    "ts": ts_iso[i],
                     "mode": mode,
                     "score": nota * 4.0, # Compatibilidade
                     "nota": nota,
@@ -157,7 +157,9 @@ async def process_cell(
                     "wind_speed": cond.wind_speed_kmh,
                     "wind_deg": cond.wind_from_deg,
                     "wave_height": cond.wave_height_m,
-                    "temp": cond.air_temp_c
+                    "temp": cond.air_temp_c,
+                    # Pesos custom/modos novos (cubo e /top ao vivo)
+                    "components": stored_components(comp),
                 })
 
     return items
@@ -166,8 +168,17 @@ async def process_cell(
 async def main_async(args):
     zones = [z.strip().lower() for z in args.zones.split(",") if z.strip()]
     
-    # Filtro de praias
-    beaches = [b for b in BEACHES if not zones or any(z in [t.lower() for t in b.get("zone_tags", [])] for z in zones)]
+    # Filtro de praias (catálogo lido em streaming, só aqui e não no import)
+    beaches_path = Path(args.beaches) if args.beaches else catalogue.default_path()
+    beaches = [b for b in catalogue.iter_beaches(beaches_path)
+               if not zones or any(z in [t.lower() for t in b.get("zone_tags", [])] for z in zones)]
+
+    # Índice inteiro estável partilhado pelos artefactos (cubo)
+    index_path = Path(args.index) if args.index else catalogue.INDEX_PATH
+    index = catalogue.BeachIndex.load(index_path)
+    n_index = len(index)
+    for b in beaches: index.add(b["id"])
+    if len(index) != n_index: index.save(index_path)
     
     # Agrupar por células
     cells: dict[tuple[float, float], list[dict]] = {}
@@ -186,11 +197,19 @@ async def main_async(args):
     async with httpx.AsyncClient(limits=limits, timeout=30) as client:
         tasks = []
         sem = asyncio.Semaphore(args.concurrency)
+        failed = []
         
         async def worker(clat, clon, group):
             async with sem:
                 if args.sleep_ms > 0: await asyncio.sleep(random.uniform(0, args.sleep_ms/1000))
-                return await process_cell(client, clat, clon, group, args.days, now, horizon, args.ua, args.skip_marine)
+                try:
+                    return await process_cell(client, clat, clon, group, args.days, now, horizon, args.ua, args.skip_marine,
+                                              wx_url=args.wx_url, mr_url=args.mr_url)
+                except httpx.HTTPError as e:
+                    # Uma célula sem meteo não deve deitar abaixo o batch inteiro
+                    failed.append((clat, clon))
+                    print(f"! Célula ({clat:.2f}, {clon:.2f}) falhou: {e!r}")
+                    return []
 
         for (clat, clon), group in cell_items:
             tasks.append(asyncio.create_task(worker(clat, clon, group)))
@@ -198,23 +217,72 @@ async def main_async(args):
         nested = await asyncio.gather(*tasks)
         results = [item for sublist in nested for item in sublist]
 
-    out_path = Path(args.out or (DATA / "scores.json"))
-    out_path.write_text(json.dumps(results, ensure_ascii=False), "utf-8")
-    print(f"✓ Feito. {len(results)} registos guardados em {out_path}")
+    if failed: print(f"! {len(failed)}/{len(cell_items)} células sem dados")
+    summary = {"cells": len(cell_items), "failed_cells": len(failed), "items": len(results)}
 
-def main():
+    # Falhas a mais (ou nada): sair antes de escrever, os dados anteriores ficam
+    if not results or len(failed) > args.max_failed_ratio * len(cell_items):
+        raise SystemExit(f"✗ {len(failed)}/{len(cell_items)} células falharam, {len(results)} itens "
+                         f"(máx. {args.max_failed_ratio:.0%}); nada foi escrito")
+
+    # Scores primeiro, cubo depois: o cubo guarda a versão dos scores que acompanha
+    versions = []
+    if args.sqlite:
+        from backend.app.repo.sqlite import SQLiteRepo
+        run_id = now.strftime("run-%Y%m%dT%H%M%S%fZ")
+        with SQLiteRepo(args.sqlite) as repo:
+            n = repo.replace_all(results, version=run_id)
+        versions.append(run_id)
+        print(f"✓ Feito. {n} registos guardados em {args.sqlite} (SQLite)")
+
+    if args.out or not args.sqlite:
+        out_path = Path(args.out or (DATA / "scores.json"))
+        raw = json.dumps(results, ensure_ascii=False).encode("utf-8")
+        # Temp + replace: o backend recarrega o scores.json sozinho e nunca lê um ficheiro a meio
+        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        tmp.write_bytes(raw)
+        tmp.replace(out_path)
+        versions.append(store.scores_version(raw))
+        print(f"✓ Feito. {len(results)} registos guardados em {out_path}")
+
+    cube_path = Path(args.cube or (DATA / "cube.bin"))
+    if args.no_cube:
+        # Um cubo de um run anterior já não corresponde a estes scores
+        if cube_path.exists():
+            cube_path.unlink()
+            print(f"✓ Cubo antigo removido ({cube_path})")
+    else:
+        # Com --zones os scores também só têm estas zonas: cubo e scores continuam a par
+        t0 = time.perf_counter()
+        size = cube.write(cube_path, beaches, results, beach_ids=index.ids, scores_versions=versions)
+        print(f"✓ Cubo ({size / 1024:.0f} KB) em {time.perf_counter() - t0:.2f}s -> {cube_path}")
+    return summary
+
+def parse_args(argv: list[str] | None = None):
     ap = argparse.ArgumentParser()
     ap.add_argument("--days", type=int, default=5)
+    ap.add_argument("--beaches", default="", help="Catálogo (.json ou .ndjson); default: data/beaches.ndjson ou beaches.json")
     ap.add_argument("--zones", default="")
     ap.add_argument("--cell-res", type=float, default=0.1)
     ap.add_argument("--concurrency", type=int, default=5)
     ap.add_argument("--sleep-ms", type=int, default=100)
     ap.add_argument("--limit-cells", type=int, default=0)
     ap.add_argument("--skip-marine", action="store_true")
+    ap.add_argument("--max-failed-ratio", type=float, default=0.1,
+                    help="Fração máxima de células falhadas antes de abortar sem escrever (default: 0.1)")
     ap.add_argument("--out", default="")
+    ap.add_argument("--sqlite", default="", help="Escreve em SQLite (ex: data/scores.db) em vez de JSON")
+    ap.add_argument("--cube", default="", help="Cubo pré-calculado para o /top por zona (default: data/cube.bin)")
+    ap.add_argument("--no-cube", action="store_true")
+    ap.add_argument("--index", default="", help="Índice estável de praias (default: data/beach_index.json)")
     ap.add_argument("--ua", default="PraiaFinder/1.0")
-    args = ap.parse_args()
-    asyncio.run(main_async(args))
+    # Para apontar a um Open-Meteo falso (scripts/loadtest.py)
+    ap.add_argument("--wx-url", default=WX)
+    ap.add_argument("--mr-url", default=MR)
+    return ap.parse_args(argv)
+
+def main():
+    asyncio.run(main_async(parse_args()))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Benchmark de inserção em massa nos repositórios de scores.
+
+    python scripts/bench_scores_repo.py --items 50000
+
+Compara LocalRepo.upsert_score (um item de cada vez, O(n²) em I/O),
+LocalRepo.upsert_many e SQLiteRepo.upsert_many. Corre numa pasta temporária.
+"""
+from pathlib import Path
+import argparse, random, sys, tempfile, time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backend.app.repo.local import LocalRepo
+from backend.app.repo.sqlite import SQLiteRepo
+
+def synthetic_items(n: int, seed: int = 42) -> list[dict]:
+    rnd = random.Random(seed)
+    items = []
+    n_beaches = max(1, n // 240)  # ~5 dias x 24h x 2 modos por praia
+    for i in range(n):
+        b, rest = divmod(i, 240)
+        mode, h = ("familia", "surf")[rest % 2], rest // 2
+        nota = round(rnd.uniform(0, 10), 1)
+        items.append({
+            "beach_id": f"praia-{b % n_beaches:05d}",
+            "ts": f"2025-07-{1 + h // 24:02d}T{h % 24:02d}:00:00Z",
+            "mode": mode,
+            "score": nota * 4.0,
+            "nota": nota,
+            "breakdown": {"vento": nota, "meteo": nota, "agua": 5.0},
+            "wind_speed": rnd.uniform(0, 40),
+            "wind_deg": rnd.uniform(0, 360),
+            "wave_height": rnd.uniform(0, 3),
+            "temp": rnd.uniform(12, 35),
+        })
+    return items
+
+def bench(label: str, n: int, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<32} {n:>8} itens  {dt:8.3f}s  {n / dt:>12,.0f} itens/s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=20000)
+    ap.add_argument("--naive-items", type=int, default=1000,
+                    help="Itens para o upsert_score item-a-item (cresce O(n²))")
+    args = ap.parse_args()
+
+    items = synthetic_items(args.items)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        naive = items[: args.naive_items]
+        repo = LocalRepo(tmp / "naive.json")
+        bench("LocalRepo.upsert_score", len(naive), lambda: [repo.upsert_score(it) for it in naive])
+
+        bench("LocalRepo.upsert_many", len(items), lambda: LocalRepo(tmp / "bulk.json").upsert_many(items))
+
+        with SQLiteRepo(tmp / "scores.db") as db:
+            bench("SQLiteRepo.upsert_many", len(items), lambda: db.upsert_many(items))
+            bench("SQLiteRepo.upsert_many (update)", len(items), lambda: db.upsert_many(items))
+            some = items[0]
+            t0 = time.perf_counter()
+            for _ in range(1000):
+                db.scores_between(some["beach_id"], "familia", "2025-07-02T00:00:00Z", "2025-07-02T23:00:00Z")
+            print(f"{'SQLiteRepo.scores_between':<32} {1000:>8} queries {time.perf_counter() - t0:7.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: datetime por linha vs horas inteiras (backend/app/timeslots.py).
+
+    python scripts/bench_timeslots.py --beaches 603 --days 5
+
+Mede os três sítios onde o parse/comparação de datas pesava:
+batch (hourly.time por célula), load (índice de scores) e pedido (/top).
+"""
+from bisect import bisect_left
+from pathlib import Path
+import argparse, datetime as dt, sys, time
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backend.app import timeslots
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def row(label: str, before: float, after: float):
+    print(f"{label:<34} {before * 1000:9.1f} ms {after * 1000:9.1f} ms   x{before / max(after, 1e-9):.1f}")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--beaches", type=int, default=603)
+    ap.add_argument("--days", type=int, default=5)
+    ap.add_argument("--cells", type=int, default=300)
+    args = ap.parse_args()
+
+    start = dt.datetime(2025, 7, 1, tzinfo=dt.timezone.utc)
+    hourly = [(start + dt.timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(24 * args.days)]
+    now = start + dt.timedelta(minutes=30)
+    horizon = now + dt.timedelta(days=args.days)
+
+    # --- Batch: hourly.time de cada célula ---
+    def batch_before():
+        for _ in range(args.cells):
+            times = [dt.datetime.fromisoformat(s).replace(tzinfo=dt.timezone.utc) for s in hourly]
+            valid = [i for i, t in enumerate(times) if now <= t <= horizon]
+            [times[i].isoformat().replace("+00:00", "Z") for i in valid]
+
+    def batch_after():
+        lo, hi = timeslots.from_datetime(now, ceil=True), timeslots.from_datetime(horizon)
+        for _ in range(args.cells):
+            times = timeslots.parse_hours(hourly)
+            valid = [i for i, t in enumerate(times) if lo <= t <= hi]
+            [timeslots.to_iso(times[i]) for i in valid]
+
+    # --- Load: um ts por item de score ---
+    ts_rows = [timeslots.to_iso(timeslots.parse_hour(s)) for s in hourly] * (args.beaches * 2)
+
+    def load_before():
+        last = dt.datetime.min.replace(tzinfo=dt.timezone.utc)
+        for s in ts_rows:
+            ts = dt.datetime.fromisoformat(s.replace("Z", "+00:00"))
+            if ts > last: last = ts
+
+    def load_after():
+        hour, last = timeslots.HourCache(), -1
+        for s in ts_rows:
+            h = hour(s)
+            if h > last: last = h
+
+    # --- Pedido: slot mais próximo para cada praia ---
+    dt_series = [(dt.datetime.fromisoformat(s).replace(tzinfo=dt.timezone.utc), None) for s in hourly]
+    h_series = [(h, None) for h in timeslots.parse_hours(hourly)]
+    target_dt = start + dt.timedelta(hours=30, minutes=10)
+
+    def request_before():
+        for _ in range(args.beaches):
+            times = [x[0] for x in dt_series]
+            i = bisect_left(times, target_dt)
+            dt_series[min(i, len(dt_series) - 1)][0].isoformat()
+
+    def request_after():
+        target_h = timeslots.from_datetime(target_dt, ceil=True)
+        for _ in range(args.beaches):
+            i = bisect_left(h_series, target_h, key=lambda x: x[0])
+            timeslots.to_datetime(h_series[min(i, len(h_series) - 1)][0]).isoformat()
+
+    print(f"{'':<34} {'datetime':>12} {'epoch-hour':>12}")
+    row(f"batch ({args.cells} células)", timed(batch_before), timed(batch_after))
+    row(f"load ({len(ts_rows)} scores)", timed(load_before), timed(load_after))
+    row(f"pedido /top ({args.beaches} praias)", timed(request_before), timed(request_after))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Verifica que o cubo e o /top ao vivo dão a mesma resposta para pedidos por zona.
+
+    python scripts/check_cube.py                       # data/scores.json + data/cube.bin
+    python scripts/check_cube.py --scores /tmp/s.json --cube /tmp/c.bin --zones algarve
+
+Para cada zona, modo (incluindo modos sem ranking próprio e pesos custom) e
+algumas horas do cubo compara praias, notas, breakdown e hora usada. Sai com
+código 1 se houver diferenças.
+"""
+from pathlib import Path
+from typing import get_args
+import argparse, os, sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scores", default="", help="scores.json (default: data/scores.json)")
+    ap.add_argument("--cube", default="", help="cube.bin (default: data/cube.bin)")
+    ap.add_argument("--zones", default="", help="Zonas separadas por vírgula (default: todas as do cubo)")
+    ap.add_argument("--hours", type=int, default=4, help="Horas do cubo a comparar (espalhadas)")
+    args = ap.parse_args()
+
+    # Antes do import: o store lê os caminhos do ambiente
+    if args.scores: os.environ["SCORES_PATH"] = args.scores
+    if args.cube: os.environ["CUBE_PATH"] = args.cube
+    os.environ["SNAPSHOT_PATH"] = ""
+    from backend.app import store
+    from backend.app.main import top_from_cube, top_live
+    from backend.app.models import Mode
+    from backend.app.scoring import custom_weights
+
+    cube = store.load_cube()
+    if cube is None:
+        sys.exit(f"Sem cubo em {store.CUBE_PATH}")
+    beaches = store.load_beaches()
+    zones = [z.strip().lower() for z in args.zones.split(",") if z.strip()] or sorted(cube.zones)
+    step = max(1, len(cube.hours) // max(1, args.hours))
+    hours = cube.hours[::step][:args.hours]
+    variants = [(m, None) for m in get_args(Mode)] + [("familia", custom_weights("familia", {"vento": 1.0}))]
+
+    checked = diffs = 0
+    for z in zones:
+        for mode, weights in variants:
+            for h in hours:
+                cached = top_from_cube(beaches, z, h, mode, "all", len(beaches), weights)
+                if cached is None:
+                    continue
+                live = top_live(beaches, None, None, 0, z, h, mode, "all", "nota", len(beaches), weights)
+                checked += 1
+                a = [r.model_dump() for r in cached]
+                b = [r.model_dump() for r in live]
+                if a != b:
+                    diffs += 1
+                    first = next((i for i, (x, y) in enumerate(zip(a, b)) if x != y), min(len(a), len(b)))
+                    print(f"✗ zona={z} modo={mode} pesos={weights} hora={h}: difere na posição {first}")
+                    print(f"    cubo: {a[first] if first < len(a) else None}")
+                    print(f"    vivo: {b[first] if first < len(b) else None}")
+
+    print(f"{checked} pedidos comparados, {diffs} com diferenças")
+    sys.exit(1 if diffs or not checked else 0)
+
+if __name__ == "__main__":
+    main()
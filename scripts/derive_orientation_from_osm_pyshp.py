@@ -1,8 +1,11 @@
 from pathlib import Path
-import json, math, re
+import json, math, re, sys
 from typing import Iterable, Tuple, List, Dict, Any
 
-BEACHES = Path("data/beaches.json")
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from backend.app import catalogue
+
+BEACHES = catalogue.default_path()
 
 # Preferir as linhas OSM 'coastlines' (só costa oceânica)
 COAST_GEOJSON = Path("data/derived/coast_pt.geojson")
@@ -149,12 +152,11 @@ def _fallback_classify_name_tags(b: dict) -> str:
 # ---------- principal ----------
 
 def derive_orientation():
-    beaches: List[Dict[str, Any]] = json.loads(BEACHES.read_text("utf-8"))
     segments = _load_segments()
     print(f"Segments carregados: {len(segments)}")
 
     updated: List[Dict[str, Any]] = []
-    for b in beaches:
+    for b in catalogue.iter_beaches(BEACHES):
         px, py = b["lon"], b["lat"]
 
         # 1) distância ao mar (sempre tenta encontrar)
@@ -192,7 +194,10 @@ def derive_orientation():
 
         updated.append(b)
 
-    BEACHES.write_text(json.dumps(updated, ensure_ascii=False, indent=2), "utf-8")
+    if BEACHES.suffix in (".ndjson", ".jsonl"):
+        catalogue.write_ndjson(BEACHES, updated)
+    else:
+        BEACHES.write_text(json.dumps(updated, ensure_ascii=False, indent=2), "utf-8")
     print(f"Atualizadas {len(updated)} praias (water_type/tipo, dist_mar_km, orientacao_graus)")
 
 if __name__ == "__main__":
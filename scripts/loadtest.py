@@ -0,0 +1,287 @@
+"""
+Harness de carga offline: Open-Meteo falso, batch contra ele e tráfego /top.
+
+    # 1. Open-Meteo falso (forecast + marine) com latência e erros injetados
+    python scripts/loadtest.py fake-api --port 8765 --latency-ms 80 --error-rate 0.02
+
+    # 2. Batch completo contra o servidor falso (sobe-o sozinho se não houver --wx-url);
+    #    escreve numa pasta temporária (--out-dir), em data/ só com --write-data
+    python scripts/loadtest.py batch --days 5 --latency-ms 20
+
+    # 3. Tráfego concorrente contra um backend a correr (uvicorn app.main:app)
+    python scripts/loadtest.py traffic --base http://localhost:8000 --concurrency 32 --duration 30
+
+O tráfego replica o que o frontend pede (zona, zona + geo, perto de mim,
+"ver uma praia", /beaches) e no fim mostra throughput e percentis de
+latência por tipo de pedido.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+import argparse, asyncio, datetime as dt, json, math, random, shutil, sys, tempfile, threading, time, zlib
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "batch"))
+from backend.app import catalogue
+
+# ---------- Open-Meteo falso ----------
+def _series(name: str, lat: float, lon: float, hours: int, start: dt.datetime) -> list:
+    """Série horária determinística (mesmo pedido -> mesmo payload)."""
+    seed = zlib.crc32(f"{name}:{lat:.3f}:{lon:.3f}".encode())
+    rnd = random.Random(seed)
+    phase, amp = rnd.uniform(0, 2 * math.pi), rnd.uniform(0.5, 1.0)
+    out = []
+    for h in range(hours):
+        hod = (start.hour + h) % 24
+        day = math.sin(2 * math.pi * (hod - 9) / 24)          # ciclo diário (pico ~15h)
+        slow = math.sin(2 * math.pi * h / 72 + phase)         # frentes a cada ~3 dias
+        if name == "temperature_2m":   v = 21 + 6 * day * amp + 4 * slow
+        elif name == "windspeed_10m":  v = max(0.0, 14 + 8 * day + 10 * slow)
+        elif name == "winddirection_10m": v = (300 + 60 * slow + 20 * day) % 360
+        elif name == "cloudcover":     v = min(100.0, max(0.0, 40 - 45 * slow))
+        elif name == "precipitation":  v = max(0.0, -slow - 0.6) * 3
+        elif name == "wave_height":    v = max(0.1, 1.2 + 0.9 * slow * amp)
+        elif name == "wave_period":    v = 9 + 3 * slow
+        elif name == "wave_direction": v = (290 + 30 * slow) % 360
+        elif name == "sea_surface_temperature": v = 18 + 2 * slow
+        else: v = 0.0
+        out.append(round(v, 1))
+    return out
+
+class FakeOpenMeteo(BaseHTTPRequestHandler):
+    latency_ms = 0.0
+    error_rate = 0.0
+    rnd = random.Random(0)
+    counts = {"forecast": 0, "marine": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def log_message(self, *a):  # silencioso
+        pass
+
+    def do_GET(self):
+        u = urlparse(self.path)
+        kind = "marine" if u.path.endswith("/marine") else "forecast" if u.path.endswith("/forecast") else None
+        if kind is None:
+            self.send_error(404); return
+        with self.lock:
+            self.counts[kind] += 1
+            jitter = self.rnd.uniform(0.5, 1.5)
+            fail = self.rnd.random() < self.error_rate
+        if self.latency_ms: time.sleep(self.latency_ms * jitter / 1000)
+        if fail:
+            with self.lock: self.counts["errors"] += 1
+            self.send_error(self.rnd.choice([429, 500, 503])); return
+
+        q = parse_qs(u.query)
+        lat, lon = float(q["latitude"][0]), float(q["longitude"][0])
+        days = int(q.get("forecast_days", ["7"])[0])
+        variables = [v for item in q.get("hourly", []) for v in item.split(",")]
+        # Como o Open-Meteo: começa à meia-noite UTC de hoje
+        start = dt.datetime.now(dt.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        hours = 24 * days
+        hourly = {"time": [(start + dt.timedelta(hours=h)).strftime("%Y-%m-%dT%H:%M") for h in range(hours)]}
+        for v in variables:
+            hourly[v] = _series(v, lat, lon, hours, start)
+
+        body = json.dumps({"latitude": lat, "longitude": lon, "timezone": "UTC", "hourly": hourly}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_fake_api(port: int, latency_ms: float, error_rate: float) -> ThreadingHTTPServer:
+    FakeOpenMeteo.latency_ms, FakeOpenMeteo.error_rate = latency_ms, error_rate
+    srv = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenMeteo)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def cmd_fake_api(args):
+    srv = start_fake_api(args.port, args.latency_ms, args.error_rate)
+    print(f"Open-Meteo falso em http://127.0.0.1:{srv.server_address[1]}/v1/forecast e /v1/marine (Ctrl+C para sair)")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
+
+# ---------- Batch ----------
+def cmd_batch(args):
+    import fetch_and_score
+
+    srv = None
+    wx, mr = args.wx_url, args.mr_url
+    if not wx:
+        srv = start_fake_api(0, args.latency_ms, args.error_rate)
+        base = f"http://127.0.0.1:{srv.server_address[1]}/v1"
+        wx, mr = f"{base}/forecast", f"{base}/marine"
+
+    argv = ["--days", str(args.days), "--concurrency", str(args.concurrency), "--sleep-ms", "0",
+            "--wx-url", wx, "--mr-url", mr, "--ua", "PraiaFinder-loadtest"]
+    out = None
+    if not args.write_data:
+        # Dados reais (data/) ficam intactos: scores, cubo e índice vão para outra pasta
+        out = Path(args.out_dir or tempfile.mkdtemp(prefix="praiafinder-loadtest-"))
+        out.mkdir(parents=True, exist_ok=True)
+        index = out / "beach_index.json"
+        if catalogue.INDEX_PATH.exists() and not index.exists():
+            shutil.copyfile(catalogue.INDEX_PATH, index)
+        argv += ["--out", str(out / "scores.json"), "--cube", str(out / "cube.bin"), "--index", str(index)]
+    argv += args.batch_args
+    t0 = time.perf_counter()
+    try:
+        summary = asyncio.run(fetch_and_score.main_async(fetch_and_score.parse_args(argv)))
+    finally:
+        # Também quando o batch aborta (SystemExit com falhas a mais)
+        if srv: srv.shutdown()
+    secs = time.perf_counter() - t0
+
+    print(f"\nBatch: {secs:.1f}s, {summary['cells']} células ({summary['failed_cells']} falharam), "
+          f"{summary['items']} itens, {summary['items'] / secs:,.0f} itens/s")
+    if srv:
+        c = FakeOpenMeteo.counts
+        print(f"Open-Meteo falso: {c['forecast']} forecast, {c['marine']} marine, {c['errors']} erros injetados")
+    if out:
+        print(f"Saída em {out} (backend: SCORES_PATH={out / 'scores.json'} CUBE_PATH={out / 'cube.bin'})")
+
+# ---------- Tráfego ----------
+DEFAULT_MIX = "zone=45,zone_geo=15,geo=25,check=10,beaches=5"
+
+def _when(rnd: random.Random, days: int) -> str | None:
+    if rnd.random() < 0.2: return None  # sem 'when' (agora)
+    d = dt.datetime.now(dt.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    d += dt.timedelta(days=rnd.randrange(days))
+    return d.replace(hour=rnd.choice([9, 11, 13, 15, 17])).strftime("%Y-%m-%dT%H:%M")
+
+def make_request(kind: str, rnd: random.Random, beaches: list, zones: list, days: int) -> tuple[str, dict]:
+    """(path, params) como o frontend os envia."""
+    if kind == "beaches":
+        return "/beaches", {}
+    params = {"mode": rnd.choice(["familia", "familia", "surf"]), "limit": 16}
+    when = _when(rnd, days)
+    if when: params["when"] = when
+    b = rnd.choice(beaches)
+    # Utilizador perto de uma praia (até ~20 km)
+    lat, lon = b["lat"] + rnd.uniform(-0.2, 0.2), b["lon"] + rnd.uniform(-0.2, 0.2)
+    if kind == "zone":
+        params["zone"] = rnd.choice(zones)
+    elif kind == "zone_geo":
+        params.update(zone=rnd.choice(zones), lat=round(lat, 4), lon=round(lon, 4), radius_km=10000)
+    elif kind == "geo":
+        params.update(lat=round(lat, 4), lon=round(lon, 4), radius_km=rnd.choice([10, 25, 50, 100]))
+    elif kind == "check":
+        params.update(lat=b["lat"], lon=b["lon"], radius_km=2, limit=1)
+    return "/top", params
+
+def _pct(sorted_vals: list, p: float) -> float:
+    if not sorted_vals: return float("nan")
+    k = min(len(sorted_vals) - 1, max(0, int(math.ceil(p / 100 * len(sorted_vals))) - 1))
+    return sorted_vals[k]
+
+async def run_traffic(args) -> dict:
+    mix = {}
+    for part in args.mix.split(","):
+        k, _, w = part.partition("=")
+        mix[k.strip()] = float(w or 1)
+    kinds, weights = list(mix), list(mix.values())
+
+    beaches = list(catalogue.iter_beaches(Path(args.beaches) if args.beaches else None))
+    zones = sorted({t.lower() for b in beaches for t in b.get("zone_tags", []) if t})
+    rnd = random.Random(args.seed)
+    lat_ms: dict[str, list] = {k: [] for k in kinds}
+    errors: dict[str, int] = {k: 0 for k in kinds}
+    sent = 0
+    deadline = time.perf_counter() + args.duration
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base, limits=limits, timeout=args.timeout) as client:
+        async def user():
+            nonlocal sent
+            while time.perf_counter() < deadline and (not args.requests or sent < args.requests):
+                sent += 1
+                kind = rnd.choices(kinds, weights)[0]
+                path, params = make_request(kind, rnd, beaches, zones, args.days)
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path, params=params)
+                    ok = r.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                dt_ms = (time.perf_counter() - t0) * 1000
+                if ok: lat_ms[kind].append(dt_ms)
+                else: errors[kind] += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    report = {"elapsed_s": round(elapsed, 2), "concurrency": args.concurrency, "endpoints": {}}
+    for k in kinds:
+        v = sorted(lat_ms[k])
+        report["endpoints"][k] = {
+            "ok": len(v), "errors": errors[k], "rps": round(len(v) / elapsed, 1),
+            "p50_ms": round(_pct(v, 50), 1), "p90_ms": round(_pct(v, 90), 1),
+            "p99_ms": round(_pct(v, 99), 1), "max_ms": round(v[-1], 1) if v else float("nan"),
+        }
+    allv = sorted(x for k in kinds for x in lat_ms[k])
+    report["total"] = {"ok": len(allv), "errors": sum(errors.values()), "rps": round(len(allv) / elapsed, 1),
+                       "p50_ms": round(_pct(allv, 50), 1), "p99_ms": round(_pct(allv, 99), 1)}
+    return report
+
+def cmd_traffic(args):
+    report = asyncio.run(run_traffic(args))
+    if args.json:
+        print(json.dumps(report, indent=2)); return
+    print(f"{report['elapsed_s']}s, {report['concurrency']} utilizadores concorrentes contra {args.base}")
+    print(f"{'pedido':<10} {'ok':>7} {'erros':>6} {'req/s':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for k, e in report["endpoints"].items():
+        print(f"{k:<10} {e['ok']:>7} {e['errors']:>6} {e['rps']:>8} {e['p50_ms']:>8} {e['p90_ms']:>8} {e['p99_ms']:>8} {e['max_ms']:>8}")
+    t = report["total"]
+    print(f"{'total':<10} {t['ok']:>7} {t['errors']:>6} {t['rps']:>8} {t['p50_ms']:>8} {'':>8} {t['p99_ms']:>8}")
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("fake-api", help="Servidor Open-Meteo falso")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency-ms", type=float, default=50)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.set_defaults(fn=cmd_fake_api)
+
+    p = sub.add_parser("batch", help="fetch_and_score contra o Open-Meteo falso")
+    p.add_argument("--days", type=int, default=5)
+    p.add_argument("--concurrency", type=int, default=10)
+    p.add_argument("--latency-ms", type=float, default=20)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--wx-url", default="", help="Usar um fake-api já a correr")
+    p.add_argument("--mr-url", default="")
+    p.add_argument("--out-dir", default="", help="Pasta para scores/cubo/índice (default: pasta temporária nova)")
+    p.add_argument("--write-data", action="store_true", help="Escrever em data/ (substitui os dados reais)")
+    p.add_argument("batch_args", nargs=argparse.REMAINDER,
+                   help="Resto passa para o fetch_and_score (ex: -- --out /tmp/scores.json --no-cube)")
+    p.set_defaults(fn=cmd_batch)
+
+    p = sub.add_parser("traffic", help="Tráfego concorrente contra o backend")
+    p.add_argument("--base", default="http://localhost:8000")
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--duration", type=float, default=20)
+    p.add_argument("--requests", type=int, default=0, help="Parar ao fim de N pedidos (0 = só duração)")
+    p.add_argument("--mix", default=DEFAULT_MIX)
+    p.add_argument("--days", type=int, default=5, help="Horizonte dos 'when' gerados")
+    p.add_argument("--beaches", default="")
+    p.add_argument("--timeout", type=float, default=30)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_traffic)
+
+    args = ap.parse_args()
+    if getattr(args, "batch_args", None) and args.batch_args[0] == "--":
+        args.batch_args = args.batch_args[1:]
+    args.fn(args)
+
+if __name__ == "__main__":
+    main()